@@ -24,6 +24,7 @@
 # ----------------------------------------------------------------------------------------------------------------------
 import abc
 from enum import Enum
+import numpy as np
 
 
 # ----------------------------------------------------------------------------------------------------------------------
@@ -87,6 +88,60 @@ class Criterion:
         """
         pass
 
+    # -------------------------------------------------------------------------
+    def params_key(self) -> bytes:
+        """
+        Build a key that identifies the parameters of the criterion: two criteria of the same class with the same key
+        must compute the same Φ for the same values. It is used to avoid computing the Φ again when only the weights
+        change between two rankings. By default, None is returned (the Φ are always computed).
+
+        :return: the key or None.
+        """
+        return None
+
+    # -------------------------------------------------------------------------
+    def normalize_values(self, value: np.ndarray, used_value: np.ndarray) -> None:
+        """
+        Compute the values used for the computation. If the criterion works on normalized values, the values are
+        normalized to the domain [0,1], else they are simply copied.
+
+        :param value: Values of the criterion for the different solutions.
+        :param used_value: Array where the values used for the computation are stored.
+        :return: nothing.
+        """
+
+        if self.normalized:
+            Criterion._normalize(value, used_value)
+        else:
+            # No normalization -> Simply copy 'value' in 'used_value'.
+            np.copyto(used_value, value)
+
+    # -------------------------------------------------------------------------
+    @staticmethod
+    def _normalize(value: np.ndarray, used_value: np.ndarray) -> None:
+        """
+        Normalize values to the domain [0,1] along their last axis (a matrix is normalized row by row, for example one
+        row per criterion).
+
+        :param value: Values to normalize.
+        :param used_value: Array where the normalized values are stored.
+        :return: nothing.
+        """
+
+        # Compute minimum and maximum values
+        min_value = value.min(axis=-1, keepdims=True)
+        diff = value.max(axis=-1, keepdims=True) - min_value
+
+        # Normalize (if all values are identical, they are set to 1.0)
+        identical = diff == 0.0
+        np.subtract(value, min_value, out=used_value)
+        if identical.any():
+            diff[identical] = 1.0
+            used_value /= diff
+            np.copyto(used_value, 1.0, where=identical)
+        else:
+            used_value /= diff
+
     # -------------------------------------------------------------------------
     @abc.abstractmethod
     def compute_pref(self, u: float, v: float) -> float:
@@ -98,3 +153,98 @@ class Criterion:
         :return: a number between [0,1] that represents if 'u' is a better criterion value that 'v'.
         """
         pass
+
+    # -------------------------------------------------------------------------
+    def compute_pref_vec(self, u: np.ndarray, v: np.ndarray, out: np.ndarray = None) -> np.ndarray:
+        """
+        Compute the preferences between arrays of values of the criterion (following the NumPy broadcasting rules). By
+        default, 'compute_pref' is called for each pair. Inheriting classes may override this method with a vectorized
+        version.
+
+        :param u: Values used as reference.
+        :param v: Values used to compare.
+        :param out: Array where the preferences are stored. If None, an array is allocated.
+        :return: an array of numbers between [0,1] that represent if the values of 'u' are better than those of 'v'.
+        """
+
+        pref = np.asarray(np.frompyfunc(self.compute_pref, 2, 1)(np.asarray(u, dtype=np.float64),
+                                                                np.asarray(v, dtype=np.float64)))
+        if out is None:
+            return pref.astype(np.float64)
+        np.copyto(out, pref, casting="unsafe")
+        return out
+
+    # -------------------------------------------------------------------------
+    def compute_pref_matrix(self, x: np.ndarray, out: np.ndarray = None) -> np.ndarray:
+        """
+        Compute the preferences between all pairs of values of the criterion with 'compute_pref_vec'. If it is not
+        overridden, 'compute_pref' is directly called for each pair.
+
+        :param x: Values of the criterion for the different solutions.
+        :param out: Matrix (solutions,solutions) where the preferences are stored. If None, a matrix is allocated.
+        :return: a matrix (solutions,solutions) where the element (i,j) is the preference of 'x[i]' over 'x[j]'.
+        """
+
+        if type(self).compute_pref_vec is not Criterion.compute_pref_vec:
+            pref = self.compute_pref_vec(x[:, None], x[None, :], out=out)
+            np.fill_diagonal(pref, 0.0)
+            return pref
+        return self._compute_pref_pairs(x, out)
+
+    # -------------------------------------------------------------------------
+    def _compute_pref_pairs(self, x: np.ndarray, out: np.ndarray = None) -> np.ndarray:
+        """
+        Compute the preferences between all pairs of values of the criterion by calling 'compute_pref' for each pair.
+
+        :param x: Values of the criterion for the different solutions.
+        :param out: Matrix (solutions,solutions) where the preferences are stored. If None, a matrix is allocated.
+        :return: a matrix (solutions,solutions) where the element (i,j) is the preference of 'x[i]' over 'x[j]'.
+        """
+
+        # Fill the matrix row by row from Python floats, with the method looked up once.
+        pref = np.empty((x.shape[0], x.shape[0])) if out is None else out
+        values = x.tolist()
+        compute_pref = self.compute_pref
+        for i, u in enumerate(values):
+            pref[i] = [compute_pref(u, v) for v in values]
+        np.fill_diagonal(pref, 0.0)
+        return pref
+
+    # -------------------------------------------------------------------------
+    def compute_flows(self, x: np.ndarray, fi_plus: np.ndarray, fi_minus: np.ndarray,
+                      pref: np.ndarray = None) -> None:
+        """
+        Compute the positive and negative Φ of the criterion for the different solutions. By default, they are the sums
+        of the rows and of the columns of the matrix returned by 'compute_pref_matrix'.
+
+        :param x: Values of the criterion for the different solutions.
+        :param fi_plus: Array where the positive Φ are stored.
+        :param fi_minus: Array where the negative Φ are stored.
+        :param pref: Matrix (solutions,solutions) that can be used to store the preferences. If None, a matrix is
+        allocated when needed.
+        :return: nothing.
+        """
+
+        pref = self.compute_pref_matrix(x, out=pref)
+        pref.sum(axis=1, out=fi_plus)
+        pref.sum(axis=0, out=fi_minus)
+
+    # -------------------------------------------------------------------------
+    def compute_fis(self, value: np.ndarray, used_value: np.ndarray, fi_plus: np.ndarray, fi_minus: np.ndarray,
+                    pref: np.ndarray = None) -> None:
+        """
+        Compute the values used for the computation and then the positive and negative Φ of the criterion for the
+        different solutions. By default, 'normalize_values' and 'compute_flows' are called. Inheriting classes may
+        override this method to do both steps at once.
+
+        :param value: Values of the criterion for the different solutions.
+        :param used_value: Array where the values used for the computation are stored.
+        :param fi_plus: Array where the positive Φ are stored.
+        :param fi_minus: Array where the negative Φ are stored.
+        :param pref: Matrix (solutions,solutions) that can be used to store the preferences. If None, a matrix is
+        allocated when needed.
+        :return: nothing.
+        """
+
+        self.normalize_values(value, used_value)
+        self.compute_flows(used_value, fi_plus, fi_minus, pref=pref)
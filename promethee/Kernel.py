@@ -22,10 +22,14 @@
 
 
 # ----------------------------------------------------------------------------------------------------------------------
+from typing import List
+import numpy as np
 from numpy import ndarray
 from promethee.Criterion import Criterion, CriterionType
 from promethee.Solution import Solution
 from promethee.KernelCriterion import KernelCriterion
+from promethee.LinearCriterion import LinearCriterion
+from promethee import _kernels
 
 
 # ----------------------------------------------------------------------------------------------------------------------
@@ -40,7 +44,10 @@ class Kernel:
     - Create a new kernel while specifying the number of solutions and criteria.
     - For each criterion, use the 'set_criterion' method to set its criterion by using the corresponding identifier.
     - Call the rank method with a matrix (solutions,criteria) containing the values of the solutions for each criteria.
-    - Use the 'Kernel.ordered_solutions' to obtain the identifiers of the ranked solutions.
+    - Use the 'Kernel.ordered_solutions_ids' to obtain the identifiers of the ranked solutions (or
+      'Kernel.ordered_solutions' to obtain the ranked solutions).
+
+    To rank the solutions for several sets of weights at once, call the 'rank_batch' method instead of 'rank'.
 
     Internally, since all solutions have an identifier in [0, nb_solutions-1], you may needed a correspondence table.
     Let's suppose you have a list of 5 users with identifiers 1, 5, 10, 150, and 120. You can manage that:
@@ -48,8 +55,8 @@ class Kernel:
     ::
 
         users_solutions = [1, 5, 10, 150, 120] # Correspondence table
-        for solution in kernel.ordered_solutions:
-            print("User identifier: " + str(users_solutions[solution]))
+        for solution_id in kernel.ordered_solutions_ids:
+            print("User identifier: " + str(users_solutions[solution_id]))
 
     |
 
@@ -68,12 +75,29 @@ class Kernel:
         Number of solutions.
 
     solutions:
-        List of solutions.
+        List of solutions (created at the first access).
+
+    ordered_solutions_ids:
+        Identifiers of the solutions ordered by the ranking.
 
     ordered_solutions:
         Ordered list of solutions after the ranking.
+
+    fi:
+        The global Φ of the different solutions.
+
+    fi_plus:
+        The positive Φ of the different solutions.
+
+    fi_minus:
+        The negative Φ of the different solutions.
     """
 
+    # -------------------------------------------------------------------------
+    # Maximal number of elements of the (criteria,solutions,solutions) tensor used to compute all the linear criteria
+    # at once. Above, the criteria are computed one by one.
+    _MAX_STACKED_SIZE = 2 ** 18
+
     # -------------------------------------------------------------------------
     def __init__(self, nb_criteria: int, nb_solutions: int):
         """
@@ -86,20 +110,57 @@ class Kernel:
         self.matrix = None
         self.nb_criteria = nb_criteria
         self.nb_solutions = nb_solutions
-        self.ordered_solutions = []
-
-        # Solutions
-        self.solutions = []
-        for sol_id in range(0, self.nb_solutions):
-            self.solutions.append(Solution(sol_id))
-
-        # Criteria
+        self.ordered_solutions_ids = np.zeros(0, dtype=np.intp)
+        self.fi = np.zeros(nb_solutions)
+        self._fis = np.zeros((2, nb_solutions))
+        self.fi_plus = self._fis[0]
+        self.fi_minus = self._fis[1]
+
+        self._solutions = None
+
+        # Scratch matrix for the preferences of a criterion, shared by all the criteria. It is only allocated for the
+        # problems small enough to be solved without the compiled kernels.
+        self._pref = np.empty((nb_solutions, nb_solutions)) if nb_solutions < _kernels.MIN_SOLUTIONS else None
+
+        # Scratch tensor for the preferences of all the criteria (allocated when they are computed at once for the
+        # first time).
+        self._stacked_pref = None
+
+        # Criteria (their weights are the elements of the kernel vector and their values the rows of the kernel
+        # matrices)
+        self._weights = np.zeros(nb_criteria)
+        self._values = np.zeros((nb_criteria, nb_solutions))
+        self._used = np.zeros((nb_criteria, nb_solutions))
+        self._flows = np.zeros((nb_criteria, 2, nb_solutions))
+        self._fi = np.zeros((nb_criteria, nb_solutions))
         self.criteria = []
         for criterion_id in range(0, self.nb_criteria):
-            criterion = KernelCriterion(criterion_id, self.nb_solutions)
-            self.criteria.append(criterion)
-            for (solution, value) in zip(self.solutions, criterion.values):
-                solution.values.append(value)
+            self.criteria.append(KernelCriterion(criterion_id, self.nb_solutions, value=self._values[criterion_id],
+                                                 used_value=self._used[criterion_id], fi=self._fi[criterion_id],
+                                                 fi_plus=self._flows[criterion_id, 0],
+                                                 fi_minus=self._flows[criterion_id, 1],
+                                                 weight=self._weights[criterion_id:criterion_id + 1]))
+
+    # -------------------------------------------------------------------------
+    @property
+    def solutions(self) -> List[Solution]:
+        """
+        List of solutions. Since the results are stored in the kernel, the solutions are only created when needed.
+        """
+
+        if self._solutions is None:
+            self._solutions = [Solution(sol_id, self) for sol_id in range(0, self.nb_solutions)]
+        return self._solutions
+
+    # -------------------------------------------------------------------------
+    @property
+    def ordered_solutions(self) -> List[Solution]:
+        """
+        Ordered list of solutions after the ranking.
+        """
+
+        solutions = self.solutions
+        return [solutions[sol_id] for sol_id in self.ordered_solutions_ids]
 
     # -------------------------------------------------------------------------
     def _assign_values(self, matrix: ndarray) -> None:
@@ -110,9 +171,24 @@ class Kernel:
         :return: nothing
         """
 
+        # The transposed copy into the kernel matrix makes the values of each criterion contiguous.
+        np.copyto(self._values, matrix.T)
+
+    # -------------------------------------------------------------------------
+    def _can_stack(self) -> bool:
+        """
+        Look if all the criteria can be computed at once by 'LinearCriterion.compute_fis_stacked': the problem must be
+        small enough and all criteria must be linear ones with 'p' greater than 'q'.
+
+        :return: True if the criteria can be computed at once.
+        """
+
+        if self.nb_criteria * self.nb_solutions * self.nb_solutions > self._MAX_STACKED_SIZE:
+            return False
         for criterion in self.criteria:
-            for solution_id in range(0, self.nb_solutions):
-                criterion.values[solution_id].value = matrix[solution_id, criterion.id]
+            if type(criterion.criterion) is not LinearCriterion or criterion.criterion.p <= criterion.criterion.q:
+                return False
+        return True
 
     # -------------------------------------------------------------------------
     def set_criterion(self, id: int, criterion: Criterion, weight: float = 0.0) -> Criterion:
@@ -146,42 +222,133 @@ class Kernel:
             if "weight" in criterion_dict:
                 criterion.weight = float(criterion_dict["weight"])
 
+    # -------------------------------------------------------------------------
+    def _check_matrix(self, matrix: ndarray) -> ndarray:
+        """
+        Convert a matrix of values into a float64 ndarray and verify its shape.
+
+        :param matrix: The matrix (solutions,criteria) containing the values of the solutions for each criteria.
+        :return: the converted matrix.
+        """
+
+        # Any array-like (including the deprecated 'np.matrix') is converted once into a float64 ndarray.
+        matrix = np.asarray(matrix, dtype=np.float64)
+        if matrix.shape != (self.nb_solutions, self.nb_criteria):
+            raise ValueError("The matrix must have the shape " + str((self.nb_solutions, self.nb_criteria)) +
+                             " instead of " + str(matrix.shape))
+        return matrix
+
+    # -------------------------------------------------------------------------
+    def _get_stacked_pref(self) -> ndarray:
+        """
+        Get the scratch tensor for the preferences of all the criteria (it is allocated at the first call).
+
+        :return: the tensor (criteria,solutions,solutions).
+        """
+
+        if self._stacked_pref is None:
+            self._stacked_pref = np.empty((self.nb_criteria, self.nb_solutions, self.nb_solutions))
+        return self._stacked_pref
+
+    # -------------------------------------------------------------------------
+    def _compute_criteria(self, matrix: ndarray) -> None:
+        """
+        Assign the values and compute the Φ of each criterion. They do not depend on the weights.
+
+        :param matrix: The matrix (solutions,criteria) containing the values of the solutions for each criteria.
+        :return: nothing
+        """
+
+        self.matrix = self._check_matrix(matrix)
+        self._assign_values(self.matrix)
+
+        # Compute fi for each criterion
+        if self._can_stack():
+            # As for 'KernelCriterion.compute', nothing is computed if only the weights changed.
+            keys = [criterion.cache_key() for criterion in self.criteria]
+            if any(key is None or key != criterion._cache_key for (key, criterion) in zip(keys, self.criteria)):
+                LinearCriterion.compute_fis_stacked([criterion.criterion for criterion in self.criteria],
+                                                    self._values, self._used, self._flows[:, 0], self._flows[:, 1],
+                                                    pref=self._get_stacked_pref())
+                np.subtract(self._flows[:, 0], self._flows[:, 1], out=self._fi)
+                for (key, criterion) in zip(keys, self.criteria):
+                    criterion._cache_key = key
+        else:
+            for criterion in self.criteria:
+                criterion.compute(self)
+
     # -------------------------------------------------------------------------
     def rank(self, matrix: ndarray) -> None:
         """
-        Rank the solutions and store the results in 'Kernel.ordered_solutions'.
+        Rank the solutions and store the results in 'Kernel.ordered_solutions_ids'.
 
         :param matrix: The matrix (solutions,criteria) containing the values of the solutions for each criteria.
         :return: nothing
         """
 
         if (self.nb_solutions < 2) or (self.nb_criteria==0):
-            self.ordered_solutions = []
-            for solution in self.solutions:
-                self.ordered_solutions.append(solution)
+            self.ordered_solutions_ids = np.arange(self.nb_solutions)
             return
 
-        self._assign_values(matrix)
+        total_weight = self._weights.sum()
+        if total_weight == 0.0:
+            raise ValueError("The sum of the weights of the criteria cannot be null")
 
-        # Compute fi for each criterion
-        total_weight = 0.0
-        for criterion in self.criteria:
-            criterion.normalize()
-            criterion.compute_fis(self)
-            total_weight += criterion.weight
-
-        # Compute the flow for each solution
-        for solution in self.solutions:
-            solution.fi_minus = solution.fi_plus = 0.0
-            for (criterion,val) in zip(self.criteria,solution.values):
-                solution.fi_plus += criterion.weight * val.fi_plus
-                solution.fi_minus += criterion.weight * val.fi_minus
-            solution.fi_plus /= total_weight * (len(self.solutions) - 1)
-            solution.fi_minus /= total_weight * (len(self.solutions) - 1)
-            solution.fi = solution.fi_plus - solution.fi_minus
+        self._compute_criteria(matrix)
+
+        # Compute the flow for each solution: since the positive and negative Φ of a criterion are consecutive in
+        # memory, a single product gives both weighted sums.
+        denom = total_weight * (self.nb_solutions - 1)
+        np.matmul(self._weights, self._flows.reshape(self.nb_criteria, 2 * self.nb_solutions),
+                  out=self._fis.reshape(-1))
+        self._fis /= denom
+        np.subtract(self.fi_plus, self.fi_minus, out=self.fi)
+
+        # Rank the solutions by fitness
+        self.ordered_solutions_ids = np.argsort(-self.fi, kind="stable")
+
+    # -------------------------------------------------------------------------
+    def rank_batch(self, matrix: ndarray, weights: ndarray) -> ndarray:
+        """
+        Rank the solutions for several sets of weights (for example for a sensitivity analysis). The Φ of the criteria
+        are computed once (in separate arrays) and all the sets of weights are applied with a single product. The
+        kernel is not changed: its matrix, the weights, values and Φ of its criteria, and its results ('Kernel.fi',
+        'Kernel.ordered_solutions_ids', etc.) remain those of the last call to 'rank'.
+
+        :param matrix: The matrix (solutions,criteria) containing the values of the solutions for each criteria.
+        :param weights: The matrix (sets,criteria) containing the sets of weights.
+        :return: a matrix (sets,solutions) containing, for each set of weights, the identifiers of the solutions
+        ordered by the ranking.
+        """
+
+        weights = np.asarray(weights, dtype=np.float64)
+        if weights.ndim != 2 or weights.shape[1] != self.nb_criteria:
+            raise ValueError("The weights must have the shape (sets, " + str(self.nb_criteria) + ") instead of " +
+                             str(weights.shape))
+        if (self.nb_solutions < 2) or (self.nb_criteria==0):
+            return np.tile(np.arange(self.nb_solutions), (weights.shape[0], 1))
+        total_weights = weights.sum(axis=1, keepdims=True)
+        if (total_weights == 0.0).any():
+            raise ValueError("The sum of the weights of each set cannot be null")
+
+        # Compute the Φ of each criterion in separate arrays (same computation as '_compute_criteria', but without the
+        # cache of the criteria)
+        matrix = self._check_matrix(matrix)
+        values = np.ascontiguousarray(matrix.T)
+        used = np.empty_like(values)
+        flows = np.empty((self.nb_criteria, 2, self.nb_solutions))
+        if self._can_stack():
+            LinearCriterion.compute_fis_stacked([criterion.criterion for criterion in self.criteria], values, used,
+                                                flows[:, 0], flows[:, 1], pref=self._get_stacked_pref())
+        else:
+            for (criterion, value, used_value, flow) in zip(self.criteria, values, used, flows):
+                criterion.criterion.compute_fis(value, used_value, flow[0], flow[1], pref=self._pref)
+
+        # Compute the flows for each set of weights (positive ones in the first half of the columns and negative ones
+        # in the second half)
+        fis = weights @ flows.reshape(self.nb_criteria, 2 * self.nb_solutions)
+        fis /= total_weights * (self.nb_solutions - 1)
+        fi = fis[:, :self.nb_solutions] - fis[:, self.nb_solutions:]
 
         # Rank the solutions by fitness
-        self.ordered_solutions = []
-        for solution in self.solutions:
-            self.ordered_solutions.append(solution)
-        self.ordered_solutions.sort(reverse=True, key=lambda solution: solution.fi)
+        return np.argsort(-fi, axis=1, kind="stable")
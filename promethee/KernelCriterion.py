@@ -23,6 +23,8 @@
 
 # ----------------------------------------------------------------------------------------------------------------------
 from typing import List
+import hashlib
+import numpy as np
 from promethee.Criterion import Criterion
 
 
@@ -30,13 +32,19 @@ from promethee.Criterion import Criterion
 class CriterionSolutionValue:
     """
     This class represents the value of a solution for a given criterion. It also encapsulates a set of computed values.
-    Each instance is referred by the corresponding solution and criterion instances.
+    The values are not stored in the instance: it is a view on the arrays of the corresponding kernel criterion.
 
 
     |
 
     The instance attributes are:
 
+    criterion:
+        Kernel criterion storing the values.
+
+    index:
+        Index of the solution in the arrays of the kernel criterion.
+
     fi:
         The global Φ for the pair (criterion, solution).
 
@@ -54,29 +62,79 @@ class CriterionSolutionValue:
     """
 
     # -------------------------------------------------------------------------
-    fi: float
-    fi_plus: float
-    fi_minus: float
-    value: float
-    used_value: float
+    __slots__ = ("criterion", "index")
+    criterion: "KernelCriterion"
+    index: int
 
     # -------------------------------------------------------------------------
-    def __init__(self):
+    def __init__(self, criterion: "KernelCriterion", index: int):
         """
         Constructor.
+
+        :param criterion: Kernel criterion storing the values.
+
+        :param index: Index of the solution.
         """
 
-        self.fi = 0.0
-        self.fi_plus = 0.0
-        self.fi_minus = 0.0
-        self.value = 0.0
-        self.used_value = 0.0
+        self.criterion = criterion
+        self.index = index
+
+    # -------------------------------------------------------------------------
+    @property
+    def fi(self) -> float:
+        return float(self.criterion.fi[self.index])
+
+    # -------------------------------------------------------------------------
+    @fi.setter
+    def fi(self, fi: float) -> None:
+        self.criterion.fi[self.index] = fi
+
+    # -------------------------------------------------------------------------
+    @property
+    def fi_plus(self) -> float:
+        return float(self.criterion.fi_plus[self.index])
+
+    # -------------------------------------------------------------------------
+    @fi_plus.setter
+    def fi_plus(self, fi_plus: float) -> None:
+        self.criterion.fi_plus[self.index] = fi_plus
+
+    # -------------------------------------------------------------------------
+    @property
+    def fi_minus(self) -> float:
+        return float(self.criterion.fi_minus[self.index])
+
+    # -------------------------------------------------------------------------
+    @fi_minus.setter
+    def fi_minus(self, fi_minus: float) -> None:
+        self.criterion.fi_minus[self.index] = fi_minus
+
+    # -------------------------------------------------------------------------
+    @property
+    def value(self) -> float:
+        return float(self.criterion.value[self.index])
+
+    # -------------------------------------------------------------------------
+    @value.setter
+    def value(self, value: float) -> None:
+        self.criterion.value[self.index] = value
+
+    # -------------------------------------------------------------------------
+    @property
+    def used_value(self) -> float:
+        return float(self.criterion.used_value[self.index])
+
+    # -------------------------------------------------------------------------
+    @used_value.setter
+    def used_value(self, used_value: float) -> None:
+        self.criterion.used_value[self.index] = used_value
 
 
 # ----------------------------------------------------------------------------------------------------------------------
 class KernelCriterion:
     """
-    This class represents a given criterion defined by a criterion and a set of values for each solutions.
+    This class represents a given criterion defined by a criterion and a set of values for each solutions. The values
+    are stored in arrays indexed by the solution identifiers.
 
     |
 
@@ -94,34 +152,116 @@ class KernelCriterion:
     nb_solutions:
         Number of solutions.
 
-    values:
-        Values for the criterion for the different solutions.
+    value:
+        Values of the criterion for the different solutions.
+
+    used_value:
+        Values of the criterion used for the computation (so eventually normalised).
+
+    fi:
+        The global Φ of the criterion for the different solutions.
+
+    fi_plus:
+        The positive Φ of the criterion for the different solutions.
+
+    fi_minus:
+        The negative Φ of the criterion for the different solutions.
     """
 
     # -------------------------------------------------------------------------
     id: int
     criterion: Criterion
-    weight: float
     nb_solutions: int
-    values: List[CriterionSolutionValue]
+    value: np.ndarray
+    used_value: np.ndarray
+    fi: np.ndarray
+    fi_plus: np.ndarray
+    fi_minus: np.ndarray
 
     # -------------------------------------------------------------------------
-    def __init__(self, id: int, nb_solutions: int):
+    def __init__(self, id: int, nb_solutions: int, value: np.ndarray = None, used_value: np.ndarray = None,
+                 fi: np.ndarray = None, fi_plus: np.ndarray = None, fi_minus: np.ndarray = None,
+                 weight: np.ndarray = None):
         """
         Constructor.
 
         :param id: Identifier of the criterion.
 
         :param nb_solutions: Number of solutions.
+
+        :param value: Array used to store the values (typically a row of a kernel matrix). If None, an array is
+        allocated.
+
+        :param used_value: Array used to store the values used for the computation (typically a row of a kernel
+        matrix). If None, an array is allocated.
+
+        :param fi: Array used to store the global Φ (typically a row of a kernel matrix). If None, an array is
+        allocated.
+
+        :param fi_plus: Array used to store the positive Φ (typically a row of a kernel matrix). If None, an array is
+        allocated.
+
+        :param fi_minus: Array used to store the negative Φ (typically a row of a kernel matrix). If None, an array is
+        allocated.
+
+        :param weight: Array of one element used to store the weight (typically a slice of a kernel vector). If None,
+        an array is allocated.
         """
 
         self.id = id
         self.criterion = None
-        self.weight = 0.0
+        self._weight = np.zeros(1) if weight is None else weight
         self.nb_solutions = nb_solutions
-        self.values = []
-        for _ in range(0, nb_solutions):
-            self.values.append(CriterionSolutionValue())
+        self.value = np.zeros(nb_solutions) if value is None else value
+        self.used_value = np.zeros(nb_solutions) if used_value is None else used_value
+        self.fi = np.zeros(nb_solutions) if fi is None else fi
+        self.fi_plus = np.zeros(nb_solutions) if fi_plus is None else fi_plus
+        self.fi_minus = np.zeros(nb_solutions) if fi_minus is None else fi_minus
+        self._cache_key = None
+
+    # -------------------------------------------------------------------------
+    @property
+    def weight(self) -> float:
+        return float(self._weight[0])
+
+    # -------------------------------------------------------------------------
+    @weight.setter
+    def weight(self, weight: float) -> None:
+        self._weight[0] = weight
+
+    # -------------------------------------------------------------------------
+    @property
+    def values(self) -> List[CriterionSolutionValue]:
+        """
+        Values for the criterion for the different solutions (views on the arrays of the criterion).
+        """
+
+        return [CriterionSolutionValue(self, i) for i in range(0, self.nb_solutions)]
+
+    # -------------------------------------------------------------------------
+    def cache_key(self) -> bytes:
+        """
+        Build the key that identifies the values and the parameters of the criterion used to compute the Φ.
+
+        :return: the key or None if the criterion cannot identify its parameters.
+        """
+
+        key = self.criterion.params_key()
+        if key is None:
+            return None
+        return hashlib.blake2b(type(self.criterion).__qualname__.encode() + key + self.value.tobytes(),
+                               digest_size=16).digest()
+
+    # -------------------------------------------------------------------------
+    def clear_cache(self) -> None:
+        """
+        Forget the values and parameters used for the last computation of the Φ, so that the next call to 'compute'
+        computes them again. It must be called when the arrays are computed by another way.
+
+        :return: nothing.
+        """
+
+        self._cache_key = None
 
     # -------------------------------------------------------------------------
     def normalize(self) -> None:
@@ -131,28 +271,8 @@ class KernelCriterion:
         :return: nothing.
         """
 
-        if self.criterion.normalized:
-            # Compute minimum and maximum values
-            min_value = max_value = self.values[0].value
-            for i in range(1, self.nb_solutions):
-                if max_value < self.values[i].value:
-                    max_value = self.values[i].value
-                if min_value > self.values[i].value:
-                    min_value = self.values[i].value
-            diff = max_value - min_value
-
-            # Normalize
-            if diff != 0.0:
-                for i in range(0, self.nb_solutions):
-                    self.values[i].used_value = (self.values[i].value - min_value) / diff
-            else:
-                # All values identical -> Set them to 1.0
-                for i in range(0, self.nb_solutions):
-                    self.values[i].used_value = 1.0
-        else:
-            # No normalization -> Simply copy 'original_value' in 'value'.
-            for i in range(0, self.nb_solutions):
-                self.values[i].used_value = self.values[i].value
+        self._cache_key = None
+        self.criterion.normalize_values(self.value, self.used_value)
 
     # -------------------------------------------------------------------------
     def compute_fis(self, kernel) -> None:
@@ -163,13 +283,26 @@ class KernelCriterion:
         :return: nothing.
         """
 
-        for (sol1, val1) in zip(kernel.solutions, self.values):
-            val1.fi_plus = val1.fit_minus = 0.0
-            for (sol2, val2) in zip(kernel.solutions, self.values):
-                if sol1.id == sol2.id:
-                    continue
-                val1.fi_plus += self.criterion.compute_pref(val1.used_value, val2.used_value)
-                val1.fi_minus += self.criterion.compute_pref(val2.used_value, val1.used_value)
+        self._cache_key = None
+        self.criterion.compute_flows(self.used_value, self.fi_plus, self.fi_minus, pref=kernel._pref)
+        np.subtract(self.fi_plus, self.fi_minus, out=self.fi)
+
+    # -------------------------------------------------------------------------
+    def compute(self, kernel) -> None:
+        """
+        Normalize the values and compute the different Φ (plus, minus and balance) of the criterion. It is equivalent
+        to call 'normalize' and 'compute_fis', but the criterion may do it in a single pass.
+
+        If the values and the parameters of the criterion did not change since the last call, the Φ are not computed
+        again.
+
+        :param kernel: PROMETHEE kernel to which the criterion belong.
+        :return: nothing.
+        """
 
-        for val in self.values:
-            val.fi = val.fi_plus - val.fi_minus
+        key = self.cache_key()
+        if key is not None and key == self._cache_key:
+            return
+        self.criterion.compute_fis(self.value, self.used_value, self.fi_plus, self.fi_minus, pref=kernel._pref)
+        np.subtract(self.fi_plus, self.fi_minus, out=self.fi)
+        self._cache_key = key
@@ -22,7 +22,11 @@
 
 
 # ----------------------------------------------------------------------------------------------------------------------
+import struct
+from typing import List, Union
+import numpy as np
 from promethee.Criterion import Criterion, CriterionType
+from promethee import _kernels
 
 
 # ----------------------------------------------------------------------------------------------------------------------
@@ -55,9 +59,55 @@ class LinearCriterion(Criterion):
         :param q: Value of the 'q' parameter.
         """
 
+        # The parameters are set before the type, since each change recomputes the derived values.
+        self._p = p
+        self._q = q
         Criterion.__init__(self, name=name, type=type, normalized=True)
-        self.p = p
-        self.q = q
+
+    # -------------------------------------------------------------------------
+    @property
+    def type(self) -> CriterionType:
+        return self._type
+
+    # -------------------------------------------------------------------------
+    @type.setter
+    def type(self, type: CriterionType) -> None:
+        self._type = type
+        self._recompute_params()
+
+    # -------------------------------------------------------------------------
+    @property
+    def p(self) -> float:
+        return self._p
+
+    # -------------------------------------------------------------------------
+    @p.setter
+    def p(self, p: float) -> None:
+        self._p = p
+        self._recompute_params()
+
+    # -------------------------------------------------------------------------
+    @property
+    def q(self) -> float:
+        return self._q
+
+    # -------------------------------------------------------------------------
+    @q.setter
+    def q(self, q: float) -> None:
+        self._q = q
+        self._recompute_params()
+
+    # -------------------------------------------------------------------------
+    def _recompute_params(self) -> None:
+        """
+        Compute the internal values derived from the parameters. It is called each time 'p', 'q' or 'type' changes.
+
+        :return: nothing.
+        """
+
+        self._inv_pmq = 1.0 / (self.p - self.q) if self.p != self.q else 0.0
+        self._is_max = self.type == CriterionType.LinearMaximize
+        self._sign = 1.0 if self._is_max else -1.0
 
     # -------------------------------------------------------------------------
     def apply_config(self, config: dict) -> bool:
@@ -72,6 +122,29 @@ class LinearCriterion(Criterion):
         if "q" in config:
             self.q = float(config["q"])
 
+    # -------------------------------------------------------------------------
+    def params_key(self) -> bytes:
+        """
+        Build a key that identifies the parameters of the criterion. An inheriting class may have other parameters,
+        so None is returned for it (the Φ are always computed) unless it overrides this method to extend the key.
+
+        :return: the key or None.
+        """
+
+        if type(self) is not LinearCriterion:
+            return None
+        return struct.pack("ddd?", self.p, self.q, self._sign, self.normalized)
+
+    # -------------------------------------------------------------------------
+    def _has_linear_pref(self) -> bool:
+        """
+        Verify that 'compute_pref' is not overridden by an inheriting class, in which case the vectorized and compiled
+        computations (which implement the linear preference) cannot be used.
+
+        :return: True if the preference is the linear one.
+        """
+        return type(self).compute_pref is LinearCriterion.compute_pref
+
     # -------------------------------------------------------------------------
     def compute_pref(self, u: float, v: float) -> float:
         """
@@ -82,33 +155,158 @@ class LinearCriterion(Criterion):
         :return: a number between [0,1] that represents if 'u' is a better criterion value that 'v'.
         """
 
-        d = abs(u-v)
+        # Signed difference: positive when 'u' is better than 'v'.
+        d = (u - v) * self._sign
 
-        # No solution is better
-        if d <= self.q:
+        # No solution is better ('u' must be better, even if 'q' is negative)
+        if d <= self.q or d <= 0.0:
             return 0.0
 
-        # One solution is better than the other one
+        # 'u' is better than 'v'
         if d >= self.p:
-            if self.type == CriterionType.LinearMaximize:
-                if u > v:
-                    return 1.0
-                else:
-                    return 0.0
-            else:  # self.criterion == CriterionType.LinearMinimize
-                if u < v:
-                    return 1.0
-                else:
-                    return 0.0
-
-        # Between q and p -> Compute the preference.
-        if self.type == CriterionType.LinearMaximize:
-            if u > v:
-                return (d - self.q) / (self.p - self.q)
-            else:
-                return 0.0
-        else:  # self.criterion == CriterionType.LinearMinimize
-            if u < v:
-                return (d - self.q) / (self.p - self.q)
-            else:
-                return 0.0
+            return 1.0
+        return (d - self.q) * self._inv_pmq
+
+    # -------------------------------------------------------------------------
+    def compute_pref_vec(self, u: np.ndarray, v: np.ndarray, out: np.ndarray = None) -> np.ndarray:
+        """
+        Compute the preferences between arrays of values of the criterion (following the NumPy broadcasting rules)
+        without any branch.
+
+        :param u: Values used as reference.
+        :param v: Values used to compare.
+        :param out: Array where the preferences are stored. If None, an array is allocated.
+        :return: an array of numbers between [0,1] that represent if the values of 'u' are better than those of 'v'.
+        """
+
+        if not self._has_linear_pref():
+            return Criterion.compute_pref_vec(self, u, v, out=out)
+
+        # Signed difference: positive when 'u' is better than 'v'. The result is always a float64 array (even for
+        # integer or scalar values) since the next steps are done in place.
+        if self._is_max:
+            d = np.subtract(u, v, out=out, dtype=np.float64)
+        else:
+            d = np.subtract(v, u, out=out, dtype=np.float64)
+        return self._compute_prefs(np.asarray(d), self.q, self._inv_pmq, ramp=self.p > self.q,
+                                   negative_q=self.q < 0.0)
+
+    # -------------------------------------------------------------------------
+    @staticmethod
+    def _compute_prefs(d: np.ndarray, q: Union[float, np.ndarray], inv_pmq: Union[float, np.ndarray], ramp: bool,
+                       negative_q: bool) -> np.ndarray:
+        """
+        Transform in place signed differences between values into preferences. The parameters are either scalars or
+        arrays broadcast against the differences (for example one value per criterion).
+
+        :param d: Signed differences: positive when the value used as reference is better than the value to compare.
+        :param q: Value of the 'q' parameter.
+        :param inv_pmq: Value of '1/(p-q)'.
+        :param ramp: Is 'p' greater than 'q' (else the preference is a step at 'q')?
+        :param negative_q: Is one of the 'q' parameters negative?
+        :return: 'd', with numbers between [0,1] that represent if the values used as reference are better.
+        """
+
+        # The negative differences are cut by the clipping, except if 'q' is negative.
+        worse = d <= 0.0 if negative_q else None
+        if ramp:
+            d -= q
+            d *= inv_pmq
+            np.clip(d, 0.0, 1.0, out=d)
+        else:
+            np.greater(d, q, out=d)
+        if worse is not None:
+            d[worse] = 0.0
+        return d
+
+    # -------------------------------------------------------------------------
+    def compute_pref_matrix(self, x: np.ndarray, out: np.ndarray = None) -> np.ndarray:
+        """
+        Compute the preferences between all pairs of values of the criterion in one pass.
+
+        :param x: Values of the criterion for the different solutions.
+        :param out: Matrix (solutions,solutions) where the preferences are stored. If None, a matrix is allocated.
+        :return: a matrix (solutions,solutions) where the element (i,j) is the preference of 'x[i]' over 'x[j]'.
+        """
+
+        if not self._has_linear_pref():
+            return self._compute_pref_pairs(x, out)
+
+        # The diagonal (null differences) is always null.
+        return self.compute_pref_vec(x[:, None], x[None, :], out=out)
+
+    # -------------------------------------------------------------------------
+    def compute_flows(self, x: np.ndarray, fi_plus: np.ndarray, fi_minus: np.ndarray,
+                      pref: np.ndarray = None) -> None:
+        """
+        Compute the positive and negative Φ of the criterion for the different solutions. For large problems, a
+        compiled kernel is used (if available) to avoid building the preference matrix.
+
+        :param x: Values of the criterion for the different solutions.
+        :param fi_plus: Array where the positive Φ are stored.
+        :param fi_minus: Array where the negative Φ are stored.
+        :param pref: Matrix (solutions,solutions) that can be used to store the preferences. If None, a matrix is
+        allocated when needed.
+        :return: nothing.
+        """
+
+        if _kernels.HAS_NUMBA and x.shape[0] >= _kernels.MIN_SOLUTIONS and self._has_linear_pref():
+            _kernels.linear_flows(x, self.p, self.q, self._sign, False, x, fi_plus, fi_minus)
+        else:
+            Criterion.compute_flows(self, x, fi_plus, fi_minus, pref=pref)
+
+    # -------------------------------------------------------------------------
+    def compute_fis(self, value: np.ndarray, used_value: np.ndarray, fi_plus: np.ndarray, fi_minus: np.ndarray,
+                    pref: np.ndarray = None) -> None:
+        """
+        Compute the values used for the computation and then the positive and negative Φ of the criterion for the
+        different solutions. For large problems, a compiled kernel is used (if available) to do both steps at once.
+
+        :param value: Values of the criterion for the different solutions.
+        :param used_value: Array where the values used for the computation are stored.
+        :param fi_plus: Array where the positive Φ are stored.
+        :param fi_minus: Array where the negative Φ are stored.
+        :param pref: Matrix (solutions,solutions) that can be used to store the preferences. If None, a matrix is
+        allocated when needed.
+        :return: nothing.
+        """
+
+        if _kernels.HAS_NUMBA and value.shape[0] >= _kernels.MIN_SOLUTIONS and self._has_linear_pref():
+            _kernels.linear_flows(value, self.p, self.q, self._sign, self.normalized, used_value, fi_plus, fi_minus)
+        else:
+            Criterion.compute_fis(self, value, used_value, fi_plus, fi_minus, pref=pref)
+
+    # -------------------------------------------------------------------------
+    @staticmethod
+    def compute_fis_stacked(criteria: List["LinearCriterion"], value: np.ndarray, used_value: np.ndarray,
+                            fi_plus: np.ndarray, fi_minus: np.ndarray, pref: np.ndarray = None) -> None:
+        """
+        Compute the values used for the computation and then the positive and negative Φ of several linear criteria
+        at once, with a (criteria,solutions,solutions) tensor of preferences. It avoids the overhead of one call per
+        criterion on small problems. The 'p' parameter of each criterion must be greater than its 'q' parameter.
+
+        :param criteria: Linear criteria.
+        :param value: Matrix (criteria,solutions) of the values of the criteria.
+        :param used_value: Matrix (criteria,solutions) where the values used for the computation are stored.
+        :param fi_plus: Matrix (criteria,solutions) where the positive Φ are stored.
+        :param fi_minus: Matrix (criteria,solutions) where the negative Φ are stored.
+        :param pref: Tensor (criteria,solutions,solutions) that can be used to store the preferences. If None, a tensor
+        is allocated.
+        :return: nothing.
+        """
+
+        normalized = np.array([criterion.normalized for criterion in criteria])
+        sign = np.array([criterion._sign for criterion in criteria])[:, None, None]
+        q = np.array([criterion.q for criterion in criteria])[:, None, None]
+        inv_pmq = np.array([criterion._inv_pmq for criterion in criteria])[:, None, None]
+
+        # Values used (normalized row by row)
+        Criterion._normalize(value, used_value)
+        used_value[~normalized] = value[~normalized]
+
+        # Preferences (the diagonal, with null differences, is always null)
+        d = np.subtract(used_value[:, :, None], used_value[:, None, :], out=pref)
+        d *= sign
+        LinearCriterion._compute_prefs(d, q, inv_pmq, ramp=True, negative_q=bool((q < 0.0).any()))
+        d.sum(axis=2, out=fi_plus)
+        d.sum(axis=1, out=fi_minus)
@@ -29,7 +29,8 @@ from promethee.KernelCriterion import CriterionSolutionValue
 # ----------------------------------------------------------------------------------------------------------------------
 class Solution:
     """
-    This class represents a solution defined by a set of values for the different criteria.
+    This class represents a solution defined by a set of values for the different criteria. The values are not stored
+    in the instance: it is a view on the arrays of the kernel.
 
         |
 
@@ -38,6 +39,9 @@ class Solution:
     id:
         Identifier of the solution.
 
+    kernel:
+        PROMETHEE kernel to which the solution belong.
+
     fi:
         The global Φ for the solution.
 
@@ -52,22 +56,38 @@ class Solution:
     """
 
     # -------------------------------------------------------------------------
+    __slots__ = ("id", "kernel")
     id: int
-    fi: float
-    fi_plus: float
-    fi_minus: float
-    values: List[CriterionSolutionValue]
 
     # -------------------------------------------------------------------------
-    def __init__(self, id: int):
+    def __init__(self, id: int, kernel):
         """
         Constructor.
 
         :param id: Identifier of the solution.
+
+        :param kernel: PROMETHEE kernel to which the solution belong.
         """
 
         self.id = id
-        self.fi = 0.0
-        self.fi_plus = 0.0
-        self.fi_minus = 0.0
-        self.values = []
+        self.kernel = kernel
+
+    # -------------------------------------------------------------------------
+    @property
+    def fi(self) -> float:
+        return float(self.kernel.fi[self.id])
+
+    # -------------------------------------------------------------------------
+    @property
+    def fi_plus(self) -> float:
+        return float(self.kernel.fi_plus[self.id])
+
+    # -------------------------------------------------------------------------
+    @property
+    def fi_minus(self) -> float:
+        return float(self.kernel.fi_minus[self.id])
+
+    # -------------------------------------------------------------------------
+    @property
+    def values(self) -> List[CriterionSolutionValue]:
+        return [CriterionSolutionValue(criterion, self.id) for criterion in self.kernel.criteria]
@@ -0,0 +1,187 @@
+# ----------------------------------------------------------------------------------------------------------------------
+#
+# PROMETHEE multi-criterai decision method
+#
+# Copyright 2000-2018 by Pascal Francq (pascal@francq.info).
+#
+# This library is free software; you can redistribute it and/or
+# modify it under the terms of the GNU Library General Public
+# License as published by the Free Software Foundation; either
+# version 2.0 of the License, or (at your option) any later version.
+#
+# This library is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# Library General Public License for more details.
+#
+# You should have received a copy of the GNU Library General Public
+# License along with this library, as a file COPYING.LIB; if not, write
+# to the Free Software Foundation, Inc., 59 Temple Place, Suite 330,
+# Boston, MA  02111-1307  USA
+# ----------------------------------------------------------------------------------------------------------------------
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+"""
+Compiled kernels used for the large problems. They need the optional 'numba' package: if it is not installed,
+'HAS_NUMBA' is False and the kernels are not defined.
+
+The kernels are declared with explicit signatures: they are compiled when the module is imported (or loaded from the
+cache of numba) rather than at the first ranking.
+"""
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+import numpy as np
+try:
+    import numba
+except ImportError:
+    numba = None
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+HAS_NUMBA = numba is not None
+
+# Minimal number of solutions for which the compiled kernels are used.
+MIN_SOLUTIONS = 512
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+if HAS_NUMBA:
+
+    # -------------------------------------------------------------------------
+    @numba.njit("void(float64[::1], boolean, float64[::1])", cache=True)
+    def normalize_values(value: np.ndarray, normalize: bool, used_value: np.ndarray) -> None:
+        """
+        Compute the values used for the computation (same values as 'Criterion.normalize_values').
+
+        :param value: Values of the criterion for the different solutions.
+        :param normalize: Must the values be normalized to [0,1]?
+        :param used_value: Array where the values used for the computation are stored (may be 'value').
+        :return: nothing.
+        """
+
+        n = value.shape[0]
+        if normalize:
+            min_value = max_value = value[0]
+            for i in range(1, n):
+                if max_value < value[i]:
+                    max_value = value[i]
+                if min_value > value[i]:
+                    min_value = value[i]
+            diff = max_value - min_value
+            for i in range(n):
+                used_value[i] = (value[i] - min_value) / diff if diff != 0.0 else 1.0
+        else:
+            for i in range(n):
+                used_value[i] = value[i]
+
+    # -------------------------------------------------------------------------
+    @numba.njit("float64(float64, float64, float64, float64)", cache=True)
+    def linear_pref(d: float, p: float, q: float, inv_pmq: float) -> float:
+        """
+        Compute the preference of a linear criterion for a positive signed difference (same value as
+        'LinearCriterion.compute_pref').
+
+        :param d: Signed difference between the values (positive).
+        :param p: Value of the 'p' parameter.
+        :param q: Value of the 'q' parameter.
+        :param inv_pmq: Value of '1/(p-q)'.
+        :return: a number between [0,1].
+        """
+
+        if d <= q:
+            return 0.0
+        if d >= p:
+            return 1.0
+        return (d - q) * inv_pmq
+
+    # -------------------------------------------------------------------------
+    @numba.njit("void(float64[::1], float64, float64, float64, boolean, float64[::1], float64[::1], float64[::1], "
+                "int64)", parallel=True, fastmath={"reassoc"}, cache=True)
+    def _linear_flows(value: np.ndarray, p: float, q: float, sign: float, normalize: bool, used_value: np.ndarray,
+                      fi_plus: np.ndarray, fi_minus: np.ndarray, nb_blocks: int) -> None:
+        """
+        Implementation of 'linear_flows'. The pairs are split into 'nb_blocks' blocks computed in parallel. The arrays
+        must be contiguous.
+        """
+
+        n = value.shape[0]
+
+        # Values used
+        normalize_values(value, normalize, used_value)
+
+        # When 'p' is greater than 'q' and 'q' is not negative, the clipping of the ramp alone gives the preferences of
+        # both solutions of a pair (the one of the worse solution is null). The loop on the pairs has then no branch,
+        # which avoids the mispredictions due to the random order of the values and lets it be vectorized.
+        inv_pmq = 1.0 / (p - q) if p > q else 0.0
+        ramp = p > q and q >= 0.0
+
+        # Flows: each pair (i,j) with i<j is computed once, since at most one of the solutions is preferred. To
+        # balance the work, row 'k' is always processed with row 'n-1-k' and the blocks take these pairs of rows in
+        # turn. Each block accumulates in its own row of 'fp' and 'fm', which are summed at the end.
+        fp = np.zeros((nb_blocks, n))
+        fm = np.zeros((nb_blocks, n))
+        nb_rows = (n + 1) // 2
+        for b in numba.prange(nb_blocks):
+            for k in range(np.int64(b), nb_rows, nb_blocks):
+                for r in range(2):
+                    i = k if r == 0 else n - 1 - k
+                    if r == 1 and i == k:
+                        break
+                    value_i = sign * used_value[i]
+                    fp_i = 0.0
+                    fm_i = 0.0
+                    if ramp:
+                        for j in range(i + 1, n):
+                            d = value_i - sign * used_value[j]
+                            pref = min(max((d - q) * inv_pmq, 0.0), 1.0)
+                            inv_pref = min(max((-d - q) * inv_pmq, 0.0), 1.0)
+                            fp_i += pref
+                            fm[b, j] += pref
+                            fp[b, j] += inv_pref
+                            fm_i += inv_pref
+                    else:
+                        for j in range(i + 1, n):
+                            d = value_i - sign * used_value[j]
+                            if d > 0.0:
+                                pref = linear_pref(d, p, q, inv_pmq)
+                                fp_i += pref
+                                fm[b, j] += pref
+                            elif d < 0.0:
+                                pref = linear_pref(-d, p, q, inv_pmq)
+                                fp[b, j] += pref
+                                fm_i += pref
+                    fp[b, i] += fp_i
+                    fm[b, i] += fm_i
+        fi_plus[:] = fp.sum(axis=0)
+        fi_minus[:] = fm.sum(axis=0)
+
+    # -------------------------------------------------------------------------
+    def linear_flows(value: np.ndarray, p: float, q: float, sign: float, normalize: bool, used_value: np.ndarray,
+                     fi_plus: np.ndarray, fi_minus: np.ndarray) -> None:
+        """
+        Compute the values used for the computation and the positive and negative Φ of a linear criterion in a single
+        kernel, without building the preference matrix. Of the 'fastmath' options, only the reassociation of the sums
+        is enabled (to vectorize them): the preferences must be identical to the ones of the NumPy implementation (in
+        particular when a difference is exactly 'p' or 'q').
+
+        :param value: Values of the criterion for the different solutions.
+        :param p: Value of the 'p' parameter.
+        :param q: Value of the 'q' parameter.
+        :param sign: 1.0 if the criterion must be maximized, -1.0 if it must be minimized.
+        :param normalize: Must the values be normalized to [0,1]?
+        :param used_value: Array where the values used for the computation are stored (may be 'value').
+        :param fi_plus: Array where the positive Φ are stored.
+        :param fi_minus: Array where the negative Φ are stored.
+        :return: nothing.
+        """
+
+        # The kernel is compiled for contiguous arrays only: the other ones are copied.
+        value = np.ascontiguousarray(value, dtype=np.float64)
+        arrays = (used_value, fi_plus, fi_minus)
+        outs = [array if array.flags.c_contiguous else np.empty(array.shape[0]) for array in arrays]
+        _linear_flows(value, p, q, sign, normalize, outs[0], outs[1], outs[2], numba.get_num_threads())
+        for (array, out) in zip(arrays, outs):
+            if out is not array:
+                array[:] = out
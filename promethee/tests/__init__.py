@@ -25,16 +25,75 @@
 from unittest import TestCase
 from promethee.Kernel import Kernel
 from promethee.LinearCriterion import LinearCriterion
-from promethee.Criterion import CriterionType
+from promethee.Criterion import Criterion, CriterionType
+from promethee import _kernels
+import unittest
 import numpy as np
 
 
+# ----------------------------------------------------------------------------------------------------------------------
+class StepCriterion(LinearCriterion):
+    """
+    Linear criterion that overrides 'compute_pref' with a step at its own threshold (to test the inheriting classes).
+
+    The instance attributes are:
+
+    threshold
+        Difference above which a solution is preferred.
+    """
+
+    # -------------------------------------------------------------------------
+    def __init__(self, name: str, type: CriterionType, threshold: float = 0.3):
+        """
+        Constructor.
+
+        :param name: Name of the criterion.
+        :param type: Type of the criterion.
+        :param threshold: Difference above which a solution is preferred.
+        """
+        LinearCriterion.__init__(self, name=name, type=type)
+        self.threshold = threshold
+
+    # -------------------------------------------------------------------------
+    def compute_pref(self, u: float, v: float) -> float:
+        """
+        Compute the preference between two values of the criterion.
+
+        :param u: Value used as reference.
+        :param v: Value used to compare.
+        :return: 1 if 'u' is better than 'v' by more than the threshold, else 0.
+        """
+        return 1.0 if (u - v) * self._sign > self.threshold else 0.0
+
+
 # ----------------------------------------------------------------------------------------------------------------------
 class TestPROMETHEE(TestCase):
     """
     Class to test the PROMETHEE method.
     """
 
+    # -------------------------------------------------------------------------
+    # Values of the cars of 'test_promethee' for the criteria Price, Cons, Comfort and Power.
+    _CARS = np.array([[8.75, 6.2, 1, 30], [13.75, 7.5, 1, 50], [25, 8, 3, 80], [62.5, 20, 2, 120]])
+
+    # -------------------------------------------------------------------------
+    @staticmethod
+    def _cars_kernel(weights: tuple = (1.0, 1.0, 1.0, 1.0), p: float = 0.1) -> Kernel:
+        """
+        Build a kernel to rank the cars of 'test_promethee' (the matrix '_CARS').
+
+        :param weights: Weights of the criteria Price, Cons, Comfort and Power.
+        :param p: Value of the 'p' parameter of all the criteria.
+        :return: the kernel.
+        """
+        kernel = Kernel(nb_criteria=4, nb_solutions=4)
+        for (id, (name, type)) in enumerate((("Price", CriterionType.LinearMinimize),
+                                             ("Cons", CriterionType.LinearMinimize),
+                                             ("Comfort", CriterionType.LinearMaximize),
+                                             ("Power", CriterionType.LinearMaximize))):
+            kernel.set_criterion(id=id, criterion=LinearCriterion(name=name, type=type, p=p), weight=weights[id])
+        return kernel
+
     # -------------------------------------------------------------------------
     def test_promethee(self, weight_power: float = 1.0) -> None:
         """
@@ -51,16 +110,11 @@ class TestPROMETHEE(TestCase):
             "Comfort": {"weight": 1.0, "p": 0.2, "q": 0.05},
             "Power": {"weight": weight_power, "p": 0.2, "q": 0.05},
         }
-        matrix = a = np.matrix('8.75 6.2 1 30; 13.75 7.5 1 50; 25 8 3 80; 62.5 20 2 120')
-        print(matrix)
+        print(self._CARS)
 
-        kernel = Kernel(nb_criteria=4, nb_solutions=4)
-        kernel.set_criterion(id=0, criterion=LinearCriterion(name="Price", type=CriterionType.LinearMinimize))
-        kernel.set_criterion(id=1, criterion=LinearCriterion(name="Cons", type=CriterionType.LinearMinimize))
-        kernel.set_criterion(id=2, criterion=LinearCriterion(name="Comfort", type=CriterionType.LinearMaximize))
-        kernel.set_criterion(id=3, criterion=LinearCriterion(name="Power", type=CriterionType.LinearMaximize))
+        kernel = self._cars_kernel()
         kernel.apply_config(config=config)
-        kernel.rank(matrix)
+        kernel.rank(self._CARS)
 
         print()
         print("Car \t Φ+ \t Φ- \t Φ")
@@ -75,6 +129,257 @@ class TestPROMETHEE(TestCase):
         elif weight_power == 4.0:
             self.assertTrue(sols == [3, 2, 1, 0])
 
+    # -------------------------------------------------------------------------
+    def test_rank_twice(self) -> None:
+        """
+        Test that ranking twice the same matrix gives the same results (the Φ must not accumulate). Another matrix is
+        ranked in between, and the Φ are then computed again without the cache.
+
+        :return: Nothing.
+        """
+        kernel = self._cars_kernel()
+        kernel.rank(self._CARS)
+        sols = [(sol.id, sol.fi_plus, sol.fi_minus, sol.fi) for sol in kernel.ordered_solutions]
+        kernel.rank(self._CARS[::-1])
+        kernel.rank(self._CARS)
+        self.assertEqual(sols, [(sol.id, sol.fi_plus, sol.fi_minus, sol.fi) for sol in kernel.ordered_solutions])
+        for criterion in kernel.criteria:
+            criterion.clear_cache()
+        kernel.rank(self._CARS)
+        self.assertEqual(sols, [(sol.id, sol.fi_plus, sol.fi_minus, sol.fi) for sol in kernel.ordered_solutions])
+
+    # -------------------------------------------------------------------------
+    def test_input_matrix(self) -> None:
+        """
+        Test that the matrix given to 'rank' is converted (here a list of lists of integers) and that a matrix with a
+        wrong shape is refused.
+
+        :return: Nothing.
+        """
+        matrix = [[9, 6, 1, 30], [14, 7, 1, 50], [25, 8, 3, 80], [62, 20, 2, 120]]
+        kernel = self._cars_kernel()
+        kernel.rank(matrix)
+        ref = self._cars_kernel()
+        ref.rank(np.array(matrix, dtype=np.float64))
+        self.assertTrue(np.array_equal(kernel.fi, ref.fi))
+        self.assertEqual(kernel.matrix.dtype, np.float64)
+
+        with self.assertRaises(ValueError):
+            kernel.rank(self._CARS[:, :3])
+        with self.assertRaises(ValueError):
+            kernel.rank(self._CARS.T[:3])
+
+    # -------------------------------------------------------------------------
+    def test_null_weights(self) -> None:
+        """
+        Test that ranking with criteria whose weights sum to zero (the default weight) raises an error.
+
+        :return: Nothing.
+        """
+        kernel = Kernel(nb_criteria=2, nb_solutions=3)
+        kernel.set_criterion(id=0, criterion=LinearCriterion(name="A", type=CriterionType.LinearMinimize))
+        kernel.set_criterion(id=1, criterion=LinearCriterion(name="B", type=CriterionType.LinearMaximize))
+        with self.assertRaises(ValueError):
+            kernel.rank(np.array([[1.0, 2.0], [2.0, 1.0], [3.0, 3.0]]))
+
+    # -------------------------------------------------------------------------
+    def test_change_params(self) -> None:
+        """
+        Test that assigning directly the parameters or the type of a linear criterion is taken into account.
+
+        :return: Nothing.
+        """
+        criterion = LinearCriterion(name="Test", type=CriterionType.LinearMaximize, p=0.2, q=0.05)
+        criterion.p = 0.5
+        self.assertAlmostEqual(criterion.compute_pref(0.3, 0.0), 0.25 / 0.45)
+        criterion.type = CriterionType.LinearMinimize
+        self.assertEqual(criterion.compute_pref(1.0, 0.0), 0.0)
+        self.assertEqual(criterion.compute_pref(0.0, 1.0), 1.0)
+
+        kernel = self._cars_kernel(p=0.2)
+        kernel.rank(self._CARS)
+        for criterion in kernel.criteria:
+            criterion.criterion.p = 0.5
+        kernel.rank(self._CARS)
+        ref = self._cars_kernel(p=0.5)
+        ref.rank(self._CARS)
+        self.assertTrue(np.array_equal(kernel.fi, ref.fi))
+
+    # -------------------------------------------------------------------------
+    def test_change_weights(self) -> None:
+        """
+        Test that ranking again after a change of the weights or of the parameters gives the same results than a new
+        kernel (the Φ of the criteria are not computed again when only the weights change).
+
+        :return: Nothing.
+        """
+        kernel = self._cars_kernel()
+        kernel.rank(self._CARS)
+        for (weight_power, p) in ((4.0, 0.1), (4.0, 0.5)):
+            config = {name: {"p": p} for name in ("Price", "Cons", "Comfort")}
+            config["Power"] = {"weight": weight_power, "p": p}
+            kernel.apply_config(config=config)
+            kernel.rank(self._CARS)
+            ref = self._cars_kernel(weights=(1.0, 1.0, 1.0, weight_power), p=p)
+            ref.rank(self._CARS)
+            self.assertTrue(np.array_equal(kernel.fi, ref.fi))
+            self.assertTrue(np.array_equal(kernel.ordered_solutions_ids, ref.ordered_solutions_ids))
+
+    # -------------------------------------------------------------------------
+    def test_rank_batch(self) -> None:
+        """
+        Test the ranking for several sets of weights at once (the sets of 'test_promethee').
+
+        :return: Nothing.
+        """
+        kernel = self._cars_kernel(p=0.2)
+        matrix = self._CARS
+
+        ordered_solutions_ids = kernel.rank_batch(matrix, [[1.0, 1.0, 1.0, 1.0], [1.0, 1.0, 1.0, 4.0]])
+        self.assertEqual(ordered_solutions_ids.tolist(), [[2, 1, 0, 3], [3, 2, 1, 0]])
+        self.assertEqual([criterion.weight for criterion in kernel.criteria], [1.0, 1.0, 1.0, 1.0])
+
+        # The kernel keeps the results of the last ranking
+        kernel.rank(matrix)
+        fi, values = kernel.fi.copy(), kernel.criteria[0].value.copy()
+        kernel.rank_batch(matrix[::-1], [[1.0, 1.0, 1.0, 4.0]])
+        self.assertTrue(np.array_equal(kernel.fi, fi))
+        self.assertTrue(np.array_equal(kernel.criteria[0].value, values))
+        self.assertTrue(np.array_equal(kernel.matrix, matrix))
+        with self.assertRaises(ValueError):
+            kernel.rank_batch(matrix, [1.0, 1.0, 1.0, 1.0])
+        with self.assertRaises(ValueError):
+            kernel.rank_batch(matrix, [[1.0, 1.0, 1.0, 1.0], [0.0, 0.0, 0.0, 0.0]])
+
+    # -------------------------------------------------------------------------
+    def test_stacked(self) -> None:
+        """
+        Test that computing all the linear criteria at once gives the same Φ than computing them one by one.
+
+        :return: Nothing.
+        """
+        matrix = np.round(10.0 * np.random.default_rng(0).random((20, 3)), 1)
+        fis = []
+        for max_stacked_size in (Kernel._MAX_STACKED_SIZE, 0):
+            kernel = Kernel(nb_criteria=3, nb_solutions=20)
+            kernel._MAX_STACKED_SIZE = max_stacked_size
+            kernel.set_criterion(id=0, criterion=LinearCriterion(name="A", type=CriterionType.LinearMinimize),
+                                 weight=1.0)
+            kernel.set_criterion(id=1, criterion=LinearCriterion(name="B", type=CriterionType.LinearMaximize),
+                                 weight=2.0)
+            kernel.set_criterion(id=2, criterion=LinearCriterion(name="C", type=CriterionType.LinearMaximize, p=0.5,
+                                                                 q=0.0), weight=1.0)
+            kernel.rank(matrix)
+            fis.append(kernel.fi.copy())
+        self.assertTrue(np.allclose(fis[0], fis[1]))
+
+    # -------------------------------------------------------------------------
+    def test_pref_matrix(self) -> None:
+        """
+        Test that the preference matrix of a linear criterion (vectorized or not) is the same than the one computed
+        with 'compute_pref', including for a negative 'q'.
+
+        :return: Nothing.
+        """
+        class ScalarLinearCriterion(LinearCriterion):
+            compute_pref_vec = Criterion.compute_pref_vec
+
+        x = np.round(np.random.default_rng(0).random(10), 2)
+        for type in CriterionType:
+            for p, q in ((0.2, 0.05), (0.05, 0.2), (0.2, -0.1)):
+                criterion = LinearCriterion(name="Test", type=type, p=p, q=q)
+                pref = np.array([[criterion.compute_pref(u, v) for v in x] for u in x])
+                self.assertTrue(np.allclose(criterion.compute_pref_matrix(x), pref))
+                criterion = ScalarLinearCriterion(name="Test", type=type, p=p, q=q)
+                self.assertTrue(np.array_equal(Criterion.compute_pref_matrix(criterion, x), pref))
+
+        # Integer and scalar values
+        for criterion in (LinearCriterion(name="Test", type=CriterionType.LinearMaximize, p=0.2, q=0.05),
+                          ScalarLinearCriterion(name="Test", type=CriterionType.LinearMaximize, p=0.2, q=0.05)):
+            self.assertEqual(criterion.compute_pref_vec(np.array([1, 0]), np.array([0, 0])).tolist(), [1.0, 0.0])
+            self.assertEqual(criterion.compute_pref_vec(0.1, 0.0).dtype, np.float64)
+            self.assertAlmostEqual(float(criterion.compute_pref_vec(0.1, 0.0)), 0.05 / 0.15)
+
+    # -------------------------------------------------------------------------
+    def test_inherited_pref(self) -> None:
+        """
+        Test that a class inheriting from the linear criterion and overriding 'compute_pref' is used for all the
+        preferences and Φ (the vectorized computations of the linear preference are not used).
+
+        :return: Nothing.
+        """
+        # Small and large problems (the compiled kernel of the linear criterion is used for the large ones).
+        for n in (10, _kernels.MIN_SOLUTIONS + 1):
+            x = np.round(np.random.default_rng(0).random(n), 2)
+            for type in CriterionType:
+                criterion = StepCriterion(name="Test", type=type)
+                pref = np.array([[criterion.compute_pref(u, v) for v in x] for u in x])
+                self.assertTrue(np.array_equal(criterion.compute_pref_matrix(x), pref))
+                self.assertTrue(np.array_equal(criterion.compute_pref_vec(x[:, None], x[None, :]), pref))
+                fi_plus, fi_minus = np.zeros(n), np.zeros(n)
+                criterion.compute_flows(x, fi_plus, fi_minus)
+                self.assertTrue(np.array_equal(fi_plus, pref.sum(axis=1)))
+                self.assertTrue(np.array_equal(fi_minus, pref.sum(axis=0)))
+                used_value, fi_plus, fi_minus = np.zeros(n), np.zeros(n), np.zeros(n)
+                criterion.compute_fis(x, used_value, fi_plus, fi_minus)
+                pref = criterion.compute_pref_matrix(used_value)
+                self.assertTrue(np.array_equal(fi_plus, pref.sum(axis=1)))
+                self.assertTrue(np.array_equal(fi_minus, pref.sum(axis=0)))
+
+    # -------------------------------------------------------------------------
+    def test_inherited_params(self) -> None:
+        """
+        Test that changing a parameter of a class inheriting from the linear criterion between two rankings is taken
+        into account (the Φ of the first ranking are not reused).
+
+        :return: Nothing.
+        """
+        matrix = np.round(np.random.default_rng(0).random((10, 2)), 2)
+        kernel = Kernel(nb_criteria=2, nb_solutions=10)
+        kernel.set_criterion(id=0, criterion=StepCriterion(name="A", type=CriterionType.LinearMinimize), weight=1.0)
+        kernel.set_criterion(id=1, criterion=StepCriterion(name="B", type=CriterionType.LinearMaximize), weight=1.0)
+        kernel.rank(matrix)
+        for criterion in kernel.criteria:
+            criterion.criterion.threshold = 0.1
+        kernel.rank(matrix)
+        ref = Kernel(nb_criteria=2, nb_solutions=10)
+        ref.set_criterion(id=0, criterion=StepCriterion(name="A", type=CriterionType.LinearMinimize, threshold=0.1),
+                          weight=1.0)
+        ref.set_criterion(id=1, criterion=StepCriterion(name="B", type=CriterionType.LinearMaximize, threshold=0.1),
+                          weight=1.0)
+        ref.rank(matrix)
+        self.assertTrue(np.array_equal(kernel.fi, ref.fi))
+
+    # -------------------------------------------------------------------------
+    @unittest.skipUnless(_kernels.HAS_NUMBA, "numba is not installed")
+    def test_linear_flows(self) -> None:
+        """
+        Test that the compiled kernel of the linear criterion computes the same values and Φ than the NumPy
+        implementation (the preference matrix), with and without the ramp.
+
+        :return: Nothing.
+        """
+        n = _kernels.MIN_SOLUTIONS + 1
+        value = np.round(10.0 * np.random.default_rng(0).random(n), 1)
+        for type in CriterionType:
+            for p, q in ((0.2, 0.05), (0.2, -0.1), (0.05, 0.2)):
+                criterion = LinearCriterion(name="Test", type=type, p=p, q=q)
+                used_value, fi_plus, fi_minus = np.zeros(n), np.zeros(n), np.zeros(n)
+                criterion.compute_fis(value, used_value, fi_plus, fi_minus)
+                ref_used_value = np.zeros(n)
+                criterion.normalize_values(value, ref_used_value)
+                pref = criterion.compute_pref_matrix(ref_used_value)
+                self.assertTrue(np.array_equal(used_value, ref_used_value))
+                self.assertTrue(np.allclose(fi_plus, pref.sum(axis=1)))
+                self.assertTrue(np.allclose(fi_minus, pref.sum(axis=0)))
+
+        # Arrays that are not contiguous
+        fi_plus, fi_minus = np.zeros((n, 2)), np.zeros((n, 2))
+        criterion.compute_flows(value[::-1], fi_plus[:, 0], fi_minus[:, 0])
+        criterion.compute_flows(value[::-1].copy(), fi_plus[:, 1], fi_minus[:, 1])
+        self.assertTrue(np.array_equal(fi_plus[:, 0], fi_plus[:, 1]))
+        self.assertTrue(np.array_equal(fi_minus[:, 0], fi_minus[:, 1]))
+
 
 # ----------------------------------------------------------------------------------------------------------------------
 if __name__ == '__main__':
@@ -9,4 +9,5 @@ setup(name='promethee',
       license='GNU LGPL',
       packages=['promethee'],
       install_requires=["numpy"],
+      extras_require={"numba": ["numba"]},
       zip_safe=False)
\ No newline at end of file